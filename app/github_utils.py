@@ -1,26 +1,453 @@
-from github import Github
+from github import Auth, Github, GithubException, GithubRetry
 import os
+import logging
 import time
+import hashlib
+import asyncio
+import threading
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 
-def create_or_update_repo(task_name, files=None, create_new=True, repo_url=None):
+log = logging.getLogger(__name__)
+
+GITHUB_USER = os.getenv("GITHUB_USER")
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+
+# Retry every verb on rate limits and 5xx, waiting as long as GitHub's Retry-After asks
+# up to _MAX_RETRY_WAIT seconds, so a build never stalls on an exhausted hourly quota
+_RETRY_METHODS = frozenset(["GET", "POST", "PUT", "PATCH", "DELETE"])
+_RETRY_STATUSES = [429, 500, 502, 503, 504]
+_RETRY_TOTAL = 4
+_MAX_RETRY_WAIT = 60
+_MAX_BACKOFF = 16
+
+
+class _CappedRetryMixin:
     """
-    Create or update a GitHub repository for BUILD or REVISE rounds.
-    Adds or updates files and manages GitHub Pages deployment workflow.
-    Returns (repo_url, latest_commit_sha, pages_url).
+    Clamp every urllib3 retry wait to _MAX_RETRY_WAIT: the Retry-After header as well as
+    the backoff GithubRetry derives from X-RateLimit-Reset, which can be up to an hour.
     """
 
-    github_user = os.getenv("GITHUB_USER")
-    github_token = os.getenv("GITHUB_TOKEN")
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(_MAX_RETRY_WAIT, retry_after)
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        # GithubRetry replaces get_backoff_time on the returned instance for rate limits
+        backoff_time = retry.get_backoff_time
+        retry.get_backoff_time = lambda: min(_MAX_RETRY_WAIT, backoff_time())
+        return retry
+
+
+class _CappedGithubRetry(_CappedRetryMixin, GithubRetry):
+    pass
+
+
+class _CappedRetry(_CappedRetryMixin, Retry):
+    pass
+
+
+# Shared client: keeps connections alive across calls and retries 403/429/5xx with backoff,
+# so rate limits are handled by PyGithub instead of fixed sleeps.
+# GithubRetry adds 403 itself and only retries it when it is an actual rate-limit response.
+_GH = Github(
+    auth=Auth.Token(GITHUB_TOKEN),
+    pool_size=50,
+    retry=_CappedGithubRetry(
+        total=_RETRY_TOTAL,
+        backoff_factor=1.0,
+        backoff_max=_MAX_BACKOFF,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=_RETRY_METHODS,
+        respect_retry_after_header=True
+    ),
+    per_page=100,
+    seconds_between_requests=0.25,
+    seconds_between_writes=1.0
+) if GITHUB_TOKEN else None
+
+# Shared keep-alive session for the raw Pages REST calls PyGithub doesn't cover
+_S = requests.Session()
+_S.mount("https://", HTTPAdapter(
+    pool_connections=20,
+    pool_maxsize=20,
+    # No 403 here: a plain Retry can't tell a rate limit from a permission error
+    max_retries=_CappedRetry(
+        total=_RETRY_TOTAL,
+        backoff_factor=1.0,
+        backoff_max=_MAX_BACKOFF,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=_RETRY_METHODS,
+        respect_retry_after_header=True
+    )
+))
+_S.headers.update({
+    "Accept": "application/vnd.github.v3+json",
+    "Authorization": f"token {GITHUB_TOKEN}",
+    "X-GitHub-Api-Version": "2022-11-28"
+})
+
+_LICENSE_TEXT = """MIT License
+
+Copyright (c) 2025
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+of the Software, and to permit persons to whom the Software is furnished to do so.
+"""
+
+# ETags of Pages configs already verified, keyed by (repo full name, branch)
+_PAGES_ETAGS = {}
+
+# Last ETag and body of Git Data GETs, so repeat reads are revalidated with a free 304.
+# Shared by every GitHub worker thread (each runs its own event loop), hence the lock
+_ETAG_CACHE = {}
+_ETAG_CACHE_SIZE = 256
+_ETAG_LOCK = threading.Lock()
+
+# Git Data API attempts per request: the first try plus the same retries as the other clients
+_GIT_DATA_ATTEMPTS = _RETRY_TOTAL + 1
+
+
+def _git_data_client(token):
+    """
+    Async client for the Git Data endpoints on the commit hot path.
+    PyGithub has no async API, so these few calls go straight to the REST API; every
+    request of a commit, including the concurrent blob uploads, multiplexes over HTTP/2.
+    """
+    return httpx.AsyncClient(
+        base_url="https://api.github.com",
+        headers={
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {token}",
+            "X-GitHub-Api-Version": "2022-11-28"
+        },
+        timeout=30,
+        # Limits must go on the transport: the client ignores its own when given one
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=20)
+        )
+    )
+
+
+def _retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying a Git Data response, or None if it isn't retryable.
+    Mirrors GithubRetry: 429 and rate-limit 403s wait as long as Retry-After or
+    x-ratelimit-reset asks, other _RETRY_STATUSES back off exponentially. Waits are
+    capped at _MAX_RETRY_WAIT so a build never stalls on an exhausted hourly quota.
+    """
+    status = response.status_code
+    headers = response.headers
+    rate_limited = status == 429 or (status == 403 and (
+        "Retry-After" in headers
+        or headers.get("x-ratelimit-remaining") == "0"
+        or "rate limit" in response.text.lower()
+    ))
+
+    if rate_limited:
+        try:
+            if "Retry-After" in headers:
+                return min(_MAX_RETRY_WAIT, float(headers["Retry-After"]))
+            if "x-ratelimit-reset" in headers:
+                return min(_MAX_RETRY_WAIT, max(0.0, int(headers["x-ratelimit-reset"]) - time.time()) + 1)
+        except ValueError:
+            pass
+    elif status not in _RETRY_STATUSES:
+        return None
+    return min(_MAX_BACKOFF, 2 ** attempt)
+
+
+async def _send(client, method, path, **kwargs):
+    """
+    Send one GitHub REST request, retrying rate limits and 5xx like the PyGithub client.
+    Returns the final response (successful or not).
+    """
+    for attempt in range(_GIT_DATA_ATTEMPTS):
+        response = await client.request(method, path, **kwargs)
+        delay = _retry_delay(response, attempt) if attempt < _GIT_DATA_ATTEMPTS - 1 else None
+        if delay is None:
+            return response
+        log.warning("   ⚠️ GitHub %s %s returned %d, retrying in %.1fs", method, path, response.status_code, delay)
+        await asyncio.sleep(delay)
+    return response
+
+
+async def _api(client, method, path, **kwargs):
+    """
+    Send one GitHub REST request and return the decoded JSON body.
+    """
+    response = await _send(client, method, path, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+async def _cached_get(client, path, immutable=False, **kwargs):
+    """
+    GET a GitHub resource, revalidating a previously seen copy with If-None-Match.
+    A 304 reuses the cached body and doesn't count against the rate limit.
+    Resources addressed by SHA never change, so with immutable=True a cached copy
+    is returned without any request.
+    """
+    key = (path, tuple(sorted(kwargs.get("params", {}).items())))
+    with _ETAG_LOCK:
+        cached = _ETAG_CACHE.get(key)
+    if cached and immutable:
+        return cached[1]
+    headers = {"If-None-Match": cached[0]} if cached else {}
+
+    response = await _send(client, "GET", path, headers=headers, **kwargs)
+    if response.status_code == 304 and cached:
+        return cached[1]
+    response.raise_for_status()
+
+    body = response.json()
+    if response.headers.get("ETag"):
+        with _ETAG_LOCK:
+            if key not in _ETAG_CACHE and len(_ETAG_CACHE) >= _ETAG_CACHE_SIZE:
+                _ETAG_CACHE.pop(next(iter(_ETAG_CACHE)), None)
+            _ETAG_CACHE[key] = (response.headers["ETag"], body)
+    return body
+
+
+async def _upload_blobs(client, git_path, files, max_in_flight=8):
+    """
+    Upload file contents as Git blobs concurrently, at most max_in_flight at a time.
+    Returns the blob SHAs in the same order as files.
+    """
+    # The transport's connection limit caps sockets, not requests: HTTP/2 multiplexes every
+    # request over one connection, so in-flight requests are capped here to stay clear of
+    # secondary rate limits
+    in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def upload(content):
+        # Text goes up as-is: no base64 pass and a third less on the wire
+        async with in_flight:
+            blob = await _api(client, "POST", f"{git_path}/blobs", json={
+                "content": content,
+                "encoding": "utf-8"
+            })
+        return blob["sha"]
+
+    return await asyncio.gather(*(upload(content) for content in files.values()))
+
+
+def _git_blob_sha(content):
+    """
+    Compute the SHA Git assigns to a blob with this content, without asking GitHub.
+    """
+    data = content.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+async def _commit_files(client, repo_full_name, branch, repo_name, files):
+    """
+    Commit files, plus a default README.md/LICENSE if the branch lacks them, as one commit.
+    Returns the SHA of the branch head afterwards.
+    """
+    files = dict(files or {})
+    git_path = f"/repos/{repo_full_name}/git"
+    ref = await _cached_get(client, f"{git_path}/ref/heads/{branch}")
+    head_sha = ref["object"]["sha"]
+
+    # One tree read gives every existing path and blob SHA on the branch
+    base_tree = await _cached_get(client, f"{git_path}/trees/{head_sha}", immutable=True, params={"recursive": "1"})
+    existing = {element["path"]: element["sha"] for element in base_tree["tree"]}
+
+    # Add README.md/LICENSE if the branch doesn't have them
+    if "README.md" not in files and "README.md" not in existing:
+        files["README.md"] = f"# {repo_name}\n\nAuto-generated repository.\n\nMIT License applies."
+        log.info("📝 Adding default README.md")
+
+    if "LICENSE" not in files and "LICENSE" not in existing:
+        files["LICENSE"] = _LICENSE_TEXT
+        log.info("📝 Adding LICENSE")
+
+    # Skip files whose content is already on the branch
+    unchanged = [name for name, content in files.items() if existing.get(name) == _git_blob_sha(content)]
+    for name in unchanged:
+        del files[name]
+    if unchanged:
+        log.info("   Unchanged, skipping: %s", unchanged)
+
+    # Commit all files in a single commit
+    if not files:
+        log.info("✅ Nothing to commit, branch head: %.7s", head_sha)
+        return head_sha
+
+    log.info("📝 Committing %d files...", len(files))
+    blob_shas = await _upload_blobs(client, git_path, files)
+    elements = [
+        {"path": filename, "mode": "100644", "type": "blob", "sha": blob_sha}
+        for filename, blob_sha in zip(files.keys(), blob_shas)
+    ]
+    log.debug("   Uploaded %d blobs", len(blob_shas))
+
+    tree = await _api(client, "POST", f"{git_path}/trees", json={
+        "base_tree": base_tree["sha"],
+        "tree": elements
+    })
+    new_commit = await _api(client, "POST", f"{git_path}/commits", json={
+        "message": f"Update {', '.join(files)}",
+        "tree": tree["sha"],
+        "parents": [head_sha]
+    })
+    await _api(client, "PATCH", f"{git_path}/refs/heads/{branch}", json={"sha": new_commit["sha"]})
+    log.info("   ✅ Committed %d files (SHA: %.7s)", len(files), new_commit["sha"])
+    return new_commit["sha"]
+
+
+async def _push_files(repo_full_name, branch, repo_name, files):
+    """
+    Commit files to branch over a short-lived Git Data API client.
+    Returns the latest commit SHA.
+    """
+    async with _git_data_client(GITHUB_TOKEN) as client:
+        return await _commit_files(client, repo_full_name, branch, repo_name, files)
+
+
+def _find_repo_by_task(task_name):
+    """
+    Find the most recently updated repo of GITHUB_USER whose name starts with task_name.
+    Uses the search endpoint so filtering happens server-side in a single request. The search
+    index lags behind new repos (usually the round 1 repo created minutes earlier), so a miss
+    falls back to one page of the user's most recently updated repos.
+    """
+    try:
+        results = _GH.search_repositories(
+            query=f"user:{GITHUB_USER} {task_name} in:name",
+            sort="updated",
+            order="desc"
+        )
+        repo = next((r for r in results.get_page(0) if r.name.startswith(task_name)), None)
+        if repo is None:
+            log.info("🔍 Repo not in search index yet, checking recently updated repos...")
+            recent = _GH.get_user().get_repos(sort="updated", direction="desc")
+            repo = next((r for r in recent.get_page(0) if r.name.startswith(task_name)), None)
+    except Exception as e:
+        raise ValueError(f"Failed to find repo: {str(e)}")
+
+    if repo is None:
+        raise ValueError(f"Could not find repo for task '{task_name}'. Please provide repo_url or ensure a repo exists with this task name.")
+    return repo
 
-    if not github_user or not github_token:
-        raise ValueError("Please set GITHUB_USER and GITHUB_TOKEN in your .env file.")
 
-    g = Github(github_token)
-    user = g.get_user()
+def _wait_for_branch(repo, branch, attempts=3, delay=0.2):
+    """
+    Poll a freshly created repo until its default branch is readable.
+    Returns as soon as GitHub serves the branch instead of sleeping a fixed amount.
+    """
+    for attempt in range(attempts):
+        try:
+            repo.get_branch(branch)
+            return True
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            time.sleep(delay * 2 ** attempt)
+
+    log.warning("⚠️ Branch %s still not visible after %d attempts, continuing", branch, attempts)
+    return False
+
+
+def _ensure_pages(repo_full_name, branch, is_new=False):
+    """
+    Make sure GitHub Pages serves the repo from the root of branch.
+    New repos can't have Pages yet, so they go straight to the create call. Existing repos
+    are checked with a conditional GET (ETag) and only created or updated when needed.
+    Returns True if Pages is (now) configured for branch.
+    """
+    pages_api_url = f"https://api.github.com/repos/{repo_full_name}/pages"
+    pages_payload = {"source": {"branch": branch, "path": "/"}}
+
+    try:
+        if not is_new:
+            cached = _PAGES_ETAGS.get((repo_full_name, branch))
+            headers = {"If-None-Match": cached} if cached else {}
+            response = _S.get(pages_api_url, headers=headers, timeout=10)
+
+            if response.status_code == 304:
+                log.info("   ✅ GitHub Pages already configured (not modified)")
+                return True
+            if response.status_code == 200:
+                if response.json().get("source") == pages_payload["source"]:
+                    if response.headers.get("ETag"):
+                        _PAGES_ETAGS[(repo_full_name, branch)] = response.headers["ETag"]
+                    log.info("   ✅ GitHub Pages already configured")
+                    return True
+
+                # Site exists with a different source: PUT is idempotent
+                response = _S.put(pages_api_url, json=pages_payload, timeout=10)
+                if response.status_code == 204:
+                    log.info("   ✅ GitHub Pages source set to %s", branch)
+                    return True
+                log.warning("   ⚠️ Pages update response: %s", response.status_code)
+                log.debug("   Response: %s", response.text)
+                return False
+            if response.status_code != 404:
+                log.warning("   ⚠️ Pages lookup response: %s", response.status_code)
+                log.debug("   Response: %s", response.text)
+                return False
+
+        response = _S.post(pages_api_url, json=pages_payload, timeout=10)
+        if response.status_code in [200, 201, 204]:
+            log.info("   ✅ GitHub Pages enabled")
+            return True
+        log.warning("   ⚠️ Pages response: %s", response.status_code)
+        log.debug("   Response: %s", response.text)
+
+    except Exception as e:
+        log.warning("   ⚠️ Pages error: %s", e)
+
+    return False
+
+
+def _wait_for_pages_build(repo_full_name, commit_sha, timeout=60, interval=2):
+    """
+    Poll the latest GitHub Pages build until the build of commit_sha finishes or the timeout expires.
+    Returns the last observed build status.
+    """
+    builds_url = f"https://api.github.com/repos/{repo_full_name}/pages/builds/latest"
+    deadline = time.monotonic() + timeout
+    status = "unknown"
+
+    while time.monotonic() < deadline:
+        try:
+            response = _S.get(builds_url, timeout=10)
+            if response.status_code == 200:
+                build = response.json()
+                # Pages may still be building an older head (e.g. when it was enabled mid-commit)
+                if build.get("commit") == commit_sha:
+                    status = build.get("status", status)
+                    if status in ("built", "errored"):
+                        break
+        except Exception as e:
+            log.warning("   ⚠️ Could not read Pages build status: %s", e)
+        time.sleep(interval)
+
+    return status
+
+
+def ensure_repo(task_name, create_new=True, repo_url=None):
+    """
+    Create (BUILD) or look up (REVISE) the task's GitHub repository and enable GitHub Pages.
+    Touches no files, so it can run while the app code is still being generated.
+    Returns (repo, repo_name, pages_url, pages_enabled).
+    """
+
+    if not GITHUB_USER or not GITHUB_TOKEN:
+        raise ValueError("Please set GITHUB_USER and GITHUB_TOKEN in your .env file.")
 
     if create_new:
+        user = _GH.get_user()
         repo_name = f"{task_name}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
         repo = user.create_repo(
             repo_name,
@@ -28,254 +455,108 @@ def create_or_update_repo(task_name, files=None, create_new=True, repo_url=None)
             description="Auto-generated project for evaluation",
             auto_init=True
         )
-        print(f"✅ Created new repo: {repo_name}")
-        time.sleep(3)  # Increased wait time for repo initialization
+        log.info("✅ Created new repo: %s", repo_name)
+        _wait_for_branch(repo, repo.default_branch)
     else:
-        # REVISE round - try to get repo from repo_url, fallback to finding by task_name
+        # REVISE round - fetch repo directly from repo_url, fallback to a name search by task_name
+        repo = None
         if repo_url:
             try:
-                repo_name = repo_url.rstrip("/").split("/")[-1]
-                repo = user.get_repo(repo_name)
-                print(f"✅ Fetched existing repo from repo_url: {repo_name}")
+                owner, repo_name = repo_url.rstrip("/").split("/")[-2:]
+                repo = _GH.get_repo(f"{owner}/{repo_name}")
+                log.info("✅ Fetched existing repo from repo_url: %s", repo_name)
             except Exception as e:
-                print(f"⚠️ repo_url provided but failed ({e}). Falling back to task name search...")
-                # Fallback to task name search
-                print(f"🔍 Searching for repos matching task: {task_name}")
-                try:
-                    user_repos = user.get_repos(sort="updated", direction="desc")
-                    matching_repo = None
-                    for r in user_repos:
-                        if r.name.startswith(task_name):
-                            matching_repo = r
-                            break
-                    
-                    if matching_repo:
-                        repo = matching_repo
-                        repo_name = repo.name
-                        print(f"✅ Found matching repo by task name: {repo_name}")
-                    else:
-                        raise ValueError(f"Could not find repo for task '{task_name}'.")
-                except Exception as search_error:
-                    raise ValueError(f"Failed to find repo: {str(search_error)}")
+                log.warning("⚠️ repo_url provided but failed (%s). Falling back to task name search...", e)
         else:
-            # No repo_url provided - find repo by task_name
-            print(f"⚠️ No repo_url provided for REVISE. Searching for repos matching task: {task_name}")
-            try:
-                user_repos = user.get_repos(sort="updated", direction="desc")
-                matching_repo = None
-                for r in user_repos:
-                    if r.name.startswith(task_name):
-                        matching_repo = r
-                        break
-                
-                if matching_repo:
-                    repo = matching_repo
-                    repo_name = repo.name
-                    print(f"✅ Found matching repo by task name: {repo_name}")
-                else:
-                    raise ValueError(f"Could not find repo for task '{task_name}'. Please provide repo_url or ensure a repo exists with this task name.")
-            except Exception as e:
-                raise ValueError(f"Failed to find repo: {str(e)}")
-
-    pages_url = f"https://{github_user}.github.io/{repo_name}/"
-    branch = repo.default_branch
-    print(f"📌 Using branch: {branch}")
-
-    # === Step 1: Add/update user files ===
-    if files:
-        print(f"📝 Adding/updating {len(files)} user files...")
-        for filename, content in files.items():
-            print(f"   Processing: {filename}")
-            try:
-                # Try to get existing file
-                try:
-                    existing_file = repo.get_contents(filename, ref=branch)
-                    file_exists = True
-                    print(f"      File exists, current SHA: {existing_file.sha[:7]}")
-                except Exception:
-                    file_exists = False
-                    print(f"      File doesn't exist, will create")
-                
-                if file_exists:
-                    # Update existing file
-                    try:
-                        result = repo.update_file(
-                            existing_file.path,
-                            f"Update {filename}",
-                            content,
-                            existing_file.sha,
-                            branch=branch
-                        )
-                        print(f"   ✅ Updated {filename} (new SHA: {result['commit'].sha[:7]})")
-                    except Exception as update_error:
-                        print(f"   ❌ Update failed for {filename}: {str(update_error)}")
-                        print(f"      Error type: {type(update_error).__name__}")
-                        # Try force update by deleting and recreating
-                        print(f"      Attempting force update (delete + create)...")
-                        try:
-                            # Re-fetch to get latest SHA in case it changed
-                            fresh_file = repo.get_contents(filename, ref=branch)
-                            repo.delete_file(
-                                fresh_file.path,
-                                f"Delete {filename} for update",
-                                fresh_file.sha,
-                                branch=branch
-                            )
-                            print(f"      Deleted {filename}")
-                            time.sleep(1)  # Wait for deletion to propagate
-                            
-                            result = repo.create_file(
-                                filename,
-                                f"Recreate {filename}",
-                                content,
-                                branch=branch
-                            )
-                            print(f"   ✅ Recreated {filename} (SHA: {result['commit'].sha[:7]})")
-                        except Exception as recreate_error:
-                            print(f"   ❌ Failed to recreate {filename}: {str(recreate_error)}")
-                            print(f"      Error type: {type(recreate_error).__name__}")
-                            raise  # Re-raise to stop execution
-                else:
-                    # Create new file
-                    try:
-                        result = repo.create_file(
-                            filename,
-                            f"Add {filename}",
-                            content,
-                            branch=branch
-                        )
-                        print(f"   ✅ Created {filename} (SHA: {result['commit'].sha[:7]})")
-                    except Exception as create_error:
-                        print(f"   ❌ Failed to create {filename}: {str(create_error)}")
-                        print(f"      Error type: {type(create_error).__name__}")
-                        raise  # Re-raise to stop execution
-                
-                time.sleep(1)  # Increased delay between file operations
-                
-            except Exception as e:
-                print(f"   ❌ Fatal error processing {filename}: {str(e)}")
-                print(f"      Error type: {type(e).__name__}")
-                # Don't continue if a critical file like index.html fails
-                if filename == "index.html":
-                    raise Exception(f"Critical file {filename} failed to update: {str(e)}")
-
-    # === Step 2: Ensure README.md exists (only if not already provided) ===
-    if not files or "README.md" not in files:
-        try:
-            repo.get_contents("README.md", ref=branch)
-            print("✅ README.md already exists")
-        except Exception:
-            try:
-                readme = f"# {repo_name}\n\nAuto-generated repository.\n\nMIT License applies."
-                repo.create_file("README.md", "Add README", readme, branch=branch)
-                print("✅ Added default README.md")
-            except Exception as e:
-                print(f"⚠️ Could not add README: {e}")
-        time.sleep(0.5)
-
-    # === Step 3: Ensure LICENSE exists ===
-    if not files or "LICENSE" not in files:
-        try:
-            repo.get_contents("LICENSE", ref=branch)
-            print("✅ LICENSE already exists")
-        except Exception:
-            try:
-                license_text = """MIT License
+            log.warning("⚠️ No repo_url provided for REVISE. Searching for repos matching task: %s", task_name)
 
-Copyright (c) 2025
+        if repo is None:
+            repo = _find_repo_by_task(task_name)
+            repo_name = repo.name
+            log.info("✅ Found matching repo by task name: %s", repo_name)
 
-Permission is hereby granted, free of charge, to any person obtaining a copy
-of this software and associated documentation files (the "Software"), to deal
-in the Software without restriction, including without limitation the rights
-to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
-of the Software, and to permit persons to whom the Software is furnished to do so.
-"""
-                repo.create_file("LICENSE", "Add LICENSE", license_text, branch=branch)
-                print("✅ Added LICENSE")
-            except Exception as e:
-                print(f"⚠️ Could not add LICENSE: {e}")
-        time.sleep(0.5)
+    pages_url = f"https://{GITHUB_USER}.github.io/{repo_name}/"
+    branch = repo.default_branch
+    log.info("📌 Using branch: %s", branch)
 
-    # === Step 4: Create GitHub Pages workflow (only for BUILD) ===
+    # === Step 1: Create GitHub Pages workflow (only for BUILD) ===
     if create_new:
-        print("🔧 Setting up GitHub Pages workflow...")
+        log.info("🔧 Setting up GitHub Pages workflow...")
         
         # Note: GitHub Pages works without a workflow when enabled via API
         # The workflow is optional, so we skip it to avoid 404 errors
         # GitHub will auto-deploy from the main branch
-        print(f"   ✅ GitHub Pages will auto-deploy from {branch} branch")
-        print(f"   (Manual workflow creation skipped - not required)")
+        log.info("   ✅ GitHub Pages will auto-deploy from %s branch", branch)
+        log.debug("   (Manual workflow creation skipped - not required)")
 
-    # === Step 5: Enable GitHub Pages ===
-    if create_new:
-        print("🌐 Enabling GitHub Pages...")
-        
-        try:
-            headers = {
-                "Accept": "application/vnd.github.v3+json",
-                "Authorization": f"token {github_token}",
-                "X-GitHub-Api-Version": "2022-11-28"
-            }
-            
-            pages_payload = {
-                "source": {
-                    "branch": branch,
-                    "path": "/"
-                }
-            }
-            
-            pages_api_url = f"https://api.github.com/repos/{github_user}/{repo_name}/pages"
-            response = requests.post(pages_api_url, json=pages_payload, headers=headers, timeout=10)
-            
-            if response.status_code in [200, 201, 204]:
-                print(f"   ✅ GitHub Pages enabled")
-            else:
-                print(f"   ⚠️ Pages response: {response.status_code}")
-                print(f"   Response: {response.text}")
-        
-        except Exception as e:
-            print(f"   ⚠️ Pages error: {e}")
-        
-        time.sleep(2)
+    # === Step 2: Enable GitHub Pages ===
+    # Only needs the branch, not the files, so it is done before the commit
+    log.info("🌐 Ensuring GitHub Pages is enabled...")
+    pages_enabled = _ensure_pages(repo.full_name, branch, create_new)
+
+    return repo, repo_name, pages_url, pages_enabled
 
-    # === Step 6: Get latest commit SHA ===
-    try:
-        commits = list(repo.get_commits()[:1])
-        if commits:
-            latest_commit_sha = commits[0].sha
-            print(f"✅ Latest commit SHA: {latest_commit_sha[:7]}")
-            print(f"   Commit message: {commits[0].commit.message}")
-        else:
-            latest_commit_sha = "unknown"
-            print(f"⚠️ No commits found")
-    except Exception as e:
-        print(f"⚠️ Could not fetch commit SHA: {e}")
-        latest_commit_sha = "unknown"
 
-    # === Step 7: Force GitHub Pages redeploy (for REVISE rounds) ===
+def commit_files(repo, repo_name, pages_url, files=None, create_new=True, pages_enabled=True):
+    """
+    Commit files to a repo prepared by ensure_repo and wait for the GitHub Pages deployment.
+    Returns (repo_url, latest_commit_sha, pages_url).
+    """
+    branch = repo.default_branch
+
+    # === Step 3: Commit files ===
+    latest_commit_sha = asyncio.run(_push_files(repo.full_name, branch, repo_name, files))
+
+    # === Step 4: Force GitHub Pages redeploy (for REVISE rounds) ===
     if not create_new:
-        print("🔄 Triggering GitHub Pages rebuild...")
+        log.info("🔄 Triggering GitHub Pages rebuild...")
         try:
-            headers = {
-                "Accept": "application/vnd.github.v3+json",
-                "Authorization": f"token {github_token}",
-                "X-GitHub-Api-Version": "2022-11-28"
-            }
-            pages_api_url = f"https://api.github.com/repos/{github_user}/{repo_name}/pages/builds"
-            response = requests.post(pages_api_url, headers=headers, timeout=10)
+            pages_api_url = f"https://api.github.com/repos/{GITHUB_USER}/{repo_name}/pages/builds"
+            response = _S.post(pages_api_url, timeout=10)
             if response.status_code in [200, 201, 204]:
-                print(f"   ✅ Pages rebuild triggered")
+                log.info("   ✅ Pages rebuild triggered")
             else:
-                print(f"   ⚠️ Pages rebuild: {response.status_code}")
-                print(f"   Response: {response.text}")
+                log.warning("   ⚠️ Pages rebuild: %s", response.status_code)
+                log.debug("   Response: %s", response.text)
         except Exception as e:
-            print(f"   ⚠️ Could not trigger rebuild: {e}")
-        
-        time.sleep(2)
+            log.warning("   ⚠️ Could not trigger rebuild: %s", e)
+
+    # === Step 5: Wait for the Pages build to finish ===
+    # Nothing will build if Pages couldn't be enabled, so don't poll for the full timeout
+    if pages_enabled:
+        log.info("⏳ Waiting for GitHub Pages build...")
+        pages_status = _wait_for_pages_build(repo.full_name, latest_commit_sha)
+        log.info("   Pages build status: %s", pages_status)
+    else:
+        log.warning("   ⚠️ GitHub Pages is not enabled, skipping the build wait")
+        pages_status = "disabled"
 
-    print(f"\n✨ Repository setup complete!")
-    print(f"   Repo: {repo.html_url}")
-    print(f"   Pages: {pages_url}")
-    print(f"   (Pages deployment may take 1-2 minutes)")
+    log.info("✨ Repository setup complete!")
+    log.info("   Repo: %s", repo.html_url)
+    log.info("   Pages: %s", pages_url)
+    if pages_status != "built":
+        log.info("   (Pages deployment may take 1-2 minutes)")
     
-    return repo.html_url, latest_commit_sha, pages_url
\ No newline at end of file
+    return repo.html_url, latest_commit_sha, pages_url
+
+
+def delete_repo(repo):
+    """
+    Delete a repo created by ensure_repo whose build was abandoned.
+    Failures (e.g. a token without the delete_repo scope) are logged, not raised.
+    """
+    try:
+        repo.delete()
+        log.info("🗑️ Deleted unused repo: %s", repo.full_name)
+    except GithubException as e:
+        log.warning("⚠️ Could not delete unused repo %s: %s", repo.full_name, e)
+
+
+def create_or_update_repo(task_name, files=None, create_new=True, repo_url=None):
+    """
+    Create or update a GitHub repository for BUILD or REVISE rounds.
+    Adds or updates files and manages GitHub Pages deployment workflow.
+    Returns (repo_url, latest_commit_sha, pages_url).
+    """
+    repo, repo_name, pages_url, pages_enabled = ensure_repo(task_name, create_new, repo_url)
+    return commit_files(repo, repo_name, pages_url, files, create_new, pages_enabled)
\ No newline at end of file
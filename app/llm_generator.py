@@ -1,134 +1,233 @@
 import os
-import requests
-from dotenv import load_dotenv
+import asyncio
+import logging
+import re
+import hashlib
+import time
+import httpx
+import orjson
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import List, Dict
+from schemas import Attachment
 
-# Load environment variables
-load_dotenv()
+log = logging.getLogger(__name__)
 
 api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("GEMINI_API_KEY missing in .env")
 
-# Gemini API endpoint
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 
+@dataclass
+class KeyState:
+    """A Gemini API key and when it was last used / may be used again after a 429."""
+    key: str
+    last_used: float = 0.0
+    cooldown_until: float = 0.0
 
-def extract_base64_data(data_url: str) -> tuple:
+
+def _parse_keys(raw: str) -> List[str]:
+    """Parse GEMINI_API_KEYS given as a JSON list or a comma-separated string."""
+    raw = raw.strip()
+    if raw.startswith("["):
+        return [k.strip() for k in orjson.loads(raw) if k.strip()]
+    return [k.strip() for k in raw.split(",") if k.strip()]
+
+
+# Pool of keys rotated per request; aggregate quota grows with the number of keys
+_KEYS = [KeyState(k) for k in _parse_keys(os.getenv("GEMINI_API_KEYS") or api_key or "")]
+if not _KEYS:
+    raise ValueError("GEMINI_API_KEY (or GEMINI_API_KEYS) missing in .env")
+
+# Seconds a key is skipped after Gemini answers 429 RESOURCE_EXHAUSTED
+_KEY_COOLDOWN = 60
+
+# Gemini API endpoint (streaming: the reply arrives as server-sent events)
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse"
+
+# Shared async client: generations await Gemini without blocking the event loop
+# and reuse the keep-alive connection across calls
+_GEMINI_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=120,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    headers={"Content-Type": "application/json"}
+)
+
+# Upper bound on Gemini calls in flight across concurrent /build requests
+_GEMINI_SEMAPHORE = asyncio.Semaphore(int(os.getenv("GEMINI_CONCURRENCY", "8")))
+
+# Generated files keyed by a digest of (brief, attachments); identical re-runs skip Gemini
+_RESULT_CACHE = OrderedDict()
+_RESULT_CACHE_SIZE = 256
+
+# Compiled once, matched in a single pass: the HTML document (up to its last closing tag, as
+# scripts may contain '</html>' literals, or the end of the text) and, optionally, everything
+# from the next top-level markdown heading on.
+# Tags match case-insensitively and <html> may carry attributes (e.g. <html lang="en">)
+_EXTRACT_RE = re.compile(
+    r"(?P<html>(?i:<!DOCTYPE html>|<html\b)(?:.*(?P<end>(?i:</html>))|.*))(?:.*?^(?P<readme># .*))?",
+    re.DOTALL | re.MULTILINE
+)
+
+# Static parts of the generation prompt; only the brief and attachment list vary per call
+_PROMPT_PREFIX = (
+    "You are a professional full-stack engineer. Generate ONLY the final code outputs — no reasoning, markdown wrappers, or commentary.\n\n"
+    "Produce exactly two files:\n\n"
+    "1. index.html (fully functional, responsive, inline CSS/JS, no external dependencies except CDN if necessary, production-ready)\n"
+    "2. README.md (professional and comprehensive)\n\n"
+    "CRITICAL INSTRUCTION FOR HTML:\n"
+    "- If images/attachments are provided below, you MUST embed them as base64 data URIs directly in the HTML\n"
+    "- Do NOT try to fetch images from external URLs\n"
+    "- Use the exact base64 data provided to you for testing and demonstration purposes\n"
+    "- Example: <img src=\"data:image/png;base64,iVBORw0KGgo...\" />\n"
+    "- This allows instructors to test functionality without external dependencies\n\n"
+    "README.md MUST include these sections (in order):\n"
+    "- # Project Title\n"
+    "- ## Overview (2-3 sentences about what the app does)\n"
+    "- ## Features (bullet points of key features)\n"
+    "- ## Installation & Setup (how to run locally)\n"
+    "- ## Usage (how to use the app, include query parameters if applicable)\n"
+    "- ## Technical Details (technology stack, architecture overview)\n"
+    "- ## Code Explanation (brief explanation of key functions/components)\n"
+    "- ## License (MIT License with copyright 2025)\n\n"
+    "Brief/Requirements: "
+)
+
+_PROMPT_SUFFIX = (
+    "\n\nIMPORTANT:\n"
+    "- Start index.html with <!DOCTYPE html> and end with </html>\n"
+    "- Start README.md with # and include all sections listed above\n"
+    "- Make the app production-ready with proper error handling\n"
+    "- Include detailed comments in the code\n"
+    "- Ensure the app is responsive and works on mobile\n"
+    "- Do NOT use external JavaScript libraries unless absolutely necessary\n"
+    "- Embed all provided images as base64 data URIs in the HTML\n"
+    "Return ONLY the valid index.html and README.md file contents with no additional text."
+)
+
+
+def _pick_key() -> KeyState:
     """
-    Extract MIME type and base64 data from a data URL.
-    
-    Args:
-        data_url: Data URL in format "data:mime/type;base64,<base64_data>"
-    
-    Returns:
-        Tuple of (mime_type, base64_data)
+    Pick the least recently used key that is not cooling down (or, if all are, the one
+    whose cooldown ends first). Runs on the event loop without awaiting, so it is atomic
+    with respect to other requests and needs no lock.
     """
-    try:
-        # Format: data:image/png;base64,<base64_string>
-        if not data_url.startswith("data:"):
-            return None, None
-        
-        # Extract mime type
-        mime_part = data_url.split(";")[0].replace("data:", "")
-        
-        # Extract base64 data
-        base64_data = data_url.split(",", 1)[1] if "," in data_url else None
-        
-        return mime_part, base64_data
-    except Exception as e:
-        print(f"⚠️ Failed to parse data URL: {e}")
-        return None, None
+    now = time.monotonic()
+    ready = [k for k in _KEYS if k.cooldown_until <= now]
+    if ready:
+        chosen = min(ready, key=lambda k: k.last_used)
+    else:
+        chosen = min(_KEYS, key=lambda k: k.cooldown_until)
+    chosen.last_used = now
+    return chosen
+
 
+async def _stream_generate(body: bytes) -> str:
+    """
+    POST a request to Gemini's streaming endpoint and return the generated text.
+    Each event carries a small JSON chunk that is decoded as it arrives, so parsing overlaps
+    the download instead of waiting for one large JSON document. The README follows the
+    HTML and ends the reply, so the stream is always read to the end.
+    On 429 the key is benched and the next one tried, trying each key at most once.
+    """
+    for _ in range(len(_KEYS)):
+        key_state = _pick_key()
+        async with _GEMINI_CLIENT.stream(
+            "POST", GEMINI_URL, content=body, headers={"X-Goog-Api-Key": key_state.key}
+        ) as response:
+            if response.status_code == 429:
+                key_state.cooldown_until = time.monotonic() + _KEY_COOLDOWN
+                log.warning("⚠️ Gemini key ...%s rate limited, cooling down for %ds", key_state.key[-4:], _KEY_COOLDOWN)
+                continue
+            response.raise_for_status()
 
-def generate_app_code(brief: str, attachments: List[str] = None) -> Dict[str, str]:
+            pieces = []
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                chunk = orjson.loads(line[5:])
+                # Only the first candidate is used, as with the non-streaming reply
+                for candidate in chunk.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        pieces.append(part.get("text", ""))
+            return "".join(pieces)
+
+    raise httpx.HTTPStatusError(
+        "All Gemini API keys are rate limited (429)", request=response.request, response=response
+    )
+
+
+def _cache_key(brief: str, attachments: List[Attachment]) -> bytes:
+    """
+    Digest of the brief and the (order-independent) attachments, fed incrementally
+    so multi-MB payloads are never joined into one large buffer.
+    """
+    h = hashlib.blake2b(brief.encode(), digest_size=16)
+    for mime, data in sorted(attachments):
+        h.update(b"\0")
+        h.update(mime.encode("ascii"))
+        h.update(b";")
+        h.update(data.encode("ascii"))
+    return h.digest()
+
+
+async def generate_app_code(brief: str, attachments: List[Attachment] = None) -> Dict[str, str]:
     """
     Generate a working single-page web app and professional README.md using Gemini API.
     Supports base64 image URLs and other data attachments.
     Instructs the LLM to embed base64 images directly in the generated HTML for functionality testing.
+    Results for an identical brief and attachments are served from an in-process LRU cache.
     
     Args:
         brief: The app brief/requirements
-        attachments: Optional list of data URLs (base64 encoded)
+        attachments: Optional list of attachments parsed from base64 data URLs
     
     Returns:
         Dictionary with filename: content pairs (index.html, README.md)
     """
-    
-    # Build parts for multimodal request
-    parts = []
-    
-    # Prepare attachment information for the prompt
+    key = _cache_key(brief, attachments or [])
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        _RESULT_CACHE.move_to_end(key)
+        log.info("♻️ Reusing generated code for identical brief and attachments")
+        return dict(cached)
+
+    files = await _generate_app_code(brief, attachments)
+    # Failed generations ({}) are not cached so a retry calls Gemini again
+    if files:
+        _RESULT_CACHE[key] = files
+        if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+    return dict(files)
+
+
+async def _generate_app_code(brief: str, attachments: List[Attachment] = None) -> Dict[str, str]:
+    """Call Gemini for the brief and attachments and extract index.html and README.md."""
+    # Describe attachments for the prompt and collect image parts in one pass;
+    # the data URLs were already parsed and validated by the request schema
+    attachment_lines = []
+    image_parts = []
+    for i, (mime_type, base64_data) in enumerate(attachments or (), 1):
+        attachment_lines.append(f"- Attachment {i}: {mime_type} (base64 image attached below)\n")
+        # Only add image types to multimodal request
+        if base64_data and mime_type.startswith("image/"):
+            image_parts.append({
+                "inline_data": {
+                    "mime_type": mime_type,
+                    "data": base64_data
+                }
+            })
+            log.debug("📎 Added %s attachment to request (base64)", mime_type)
+
     attachment_info = ""
-    base64_images = {}  # Store base64 images to embed in HTML
-    
-    if attachments:
-        attachment_info = "\n\nAttachments provided (base64 encoded):\n"
-        for i, data_url in enumerate(attachments, 1):
-            mime_type, base64_data = extract_base64_data(data_url)
-            if mime_type:
-                attachment_info += f"- Attachment {i}: {mime_type} (base64 image attached below)\n"
-                # Store base64 for embedding in HTML
-                base64_images[f"attachment_{i}"] = (mime_type, base64_data)
-            else:
-                attachment_info += f"- Attachment {i}: [data provided]\n"
-    
+    if attachment_lines:
+        attachment_info = "\n\nAttachments provided (base64 encoded):\n" + "".join(attachment_lines)
+
     # Add text prompt with detailed README requirements
-    prompt_text = (
-        "You are a professional full-stack engineer. Generate ONLY the final code outputs — no reasoning, markdown wrappers, or commentary.\n\n"
-        "Produce exactly two files:\n\n"
-        "1. index.html (fully functional, responsive, inline CSS/JS, no external dependencies except CDN if necessary, production-ready)\n"
-        "2. README.md (professional and comprehensive)\n\n"
-        "CRITICAL INSTRUCTION FOR HTML:\n"
-        "- If images/attachments are provided below, you MUST embed them as base64 data URIs directly in the HTML\n"
-        "- Do NOT try to fetch images from external URLs\n"
-        "- Use the exact base64 data provided to you for testing and demonstration purposes\n"
-        "- Example: <img src=\"data:image/png;base64,iVBORw0KGgo...\" />\n"
-        "- This allows instructors to test functionality without external dependencies\n\n"
-        "README.md MUST include these sections (in order):\n"
-        "- # Project Title\n"
-        "- ## Overview (2-3 sentences about what the app does)\n"
-        "- ## Features (bullet points of key features)\n"
-        "- ## Installation & Setup (how to run locally)\n"
-        "- ## Usage (how to use the app, include query parameters if applicable)\n"
-        "- ## Technical Details (technology stack, architecture overview)\n"
-        "- ## Code Explanation (brief explanation of key functions/components)\n"
-        "- ## License (MIT License with copyright 2025)\n\n"
-        f"Brief/Requirements: {brief}"
-        f"{attachment_info}"
-        "\n\nIMPORTANT:\n"
-        "- Start index.html with <!DOCTYPE html> and end with </html>\n"
-        "- Start README.md with # and include all sections listed above\n"
-        "- Make the app production-ready with proper error handling\n"
-        "- Include detailed comments in the code\n"
-        "- Ensure the app is responsive and works on mobile\n"
-        "- Do NOT use external JavaScript libraries unless absolutely necessary\n"
-        "- Embed all provided images as base64 data URIs in the HTML\n"
-        "Return ONLY the valid index.html and README.md file contents with no additional text."
-    )
-    
-    parts.append({"text": prompt_text})
-    
-    # Add image attachments as inline data to the API request
-    if attachments:
-        for data_url in attachments:
-            mime_type, base64_data = extract_base64_data(data_url)
-            
-            if mime_type and base64_data:
-                # Only add image types to multimodal request
-                if mime_type.startswith("image/"):
-                    parts.append({
-                        "inline_data": {
-                            "mime_type": mime_type,
-                            "data": base64_data
-                        }
-                    })
-                    print(f"📎 Added {mime_type} attachment to request (base64)")
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-Goog-Api-Key": api_key
-    }
+    # Single f-string: one allocation instead of a chain of intermediate concatenations
+    prompt_text = f"{_PROMPT_PREFIX}{brief}{attachment_info}{_PROMPT_SUFFIX}"
+
+    # Build parts for multimodal request: prompt first, then the images
+    parts = [{"text": prompt_text}, *image_parts]
 
     payload = {
         "contents": [
@@ -140,65 +239,42 @@ def generate_app_code(brief: str, attachments: List[str] = None) -> Dict[str, st
 
     # Make the API request
     try:
-        print("📡 Calling Gemini API with multimodal content...")
-        response = requests.post(
-            GEMINI_URL,
-            headers=headers,
-            json=payload,
-            timeout=120
-        )
-        response.raise_for_status()
-        print("✅ Gemini API response received")
-    except requests.exceptions.Timeout:
-        print("❌ Gemini API timeout (120s)")
+        log.info("📡 Calling Gemini API with multimodal content...")
+        # orjson serialises the multi-MB inline_data strings far faster than stdlib json
+        body = orjson.dumps(payload)
+        async with _GEMINI_SEMAPHORE:
+            raw_text = await _stream_generate(body)
+        log.info("✅ Gemini API response received")
+    except httpx.TimeoutException:
+        log.error("❌ Gemini API timeout (120s)")
         return {}
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Gemini API request failed: {e}")
+    except httpx.HTTPError as e:
+        log.error("❌ Gemini API request failed: %s", e)
         return {}
-
-    try:
-        data = response.json()
     except Exception as e:
-        print(f"❌ Failed to parse Gemini response: {e}")
-        return {}
-
-    # Extract text from API response
-    try:
-        raw_text = data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
-    except Exception as e:
-        print(f"❌ Failed to extract text from Gemini response: {e}")
+        log.error("❌ Failed to parse Gemini response: %s", e)
         return {}
 
     if not raw_text:
-        print("❌ Gemini returned empty content")
+        log.error("❌ Gemini returned empty content")
         return {}
 
-    print(f"📝 Raw response length: {len(raw_text)} chars")
+    log.debug("📝 Raw response length: %d chars", len(raw_text))
 
     # --- Extract HTML ---
-    html_start = raw_text.find("<!DOCTYPE html>")
-    if html_start == -1:
-        html_start = raw_text.find("<html>")
-    
-    if html_start == -1:
-        print("❌ Could not find HTML start tag")
+    match = _EXTRACT_RE.search(raw_text)
+    if not match:
+        log.error("❌ Could not find HTML start tag")
         return {}
 
-    # Find where HTML ends
-    html_end = raw_text.rfind("</html>")
-    if html_end == -1:
-        print("⚠️ Could not find HTML end tag, using rest of text")
-        clean_html = raw_text[html_start:].strip()
-    else:
-        clean_html = raw_text[html_start:html_end + 7].strip()
+    html_part = match.group("html").strip()
+    if not match.group("end"):
+        log.warning("⚠️ Could not find HTML end tag, using rest of text")
 
-    # --- Extract README ---
-    readme_start = raw_text.lower().find("# ")
-    if readme_start > (html_end if html_end != -1 else raw_text.find("</html>")):
-        readme_part = raw_text[readme_start:].strip()
-        html_part = clean_html
+    # --- Extract README (first top-level heading after the HTML) ---
+    if match.group("readme"):
+        readme_part = match.group("readme").strip()
     else:
-        html_part = clean_html
         readme_part = (
             "# Application\n\n"
             "## Overview\n\n"
@@ -229,27 +305,24 @@ def generate_app_code(brief: str, attachments: List[str] = None) -> Dict[str, st
             "furnished to do so, subject to the following conditions:\n"
         )
 
-    # Validate HTML structure
-    if not html_part.startswith("<!DOCTYPE html>") and not html_part.startswith("<html>"):
-        html_part = f"<!DOCTYPE html>\n<html>\n{html_part}\n</html>"
-
-    if not html_part.endswith("</html>"):
+    # Validate HTML structure (the match always starts at a doctype or <html> tag)
+    if not match.group("end"):
         html_part = f"{html_part}\n</html>"
 
     # Validate README structure
     if not readme_part.startswith("#"):
         readme_part = f"# Application\n\n{readme_part}"
 
-    if "MIT License" not in readme_part and "License" not in readme_part:
+    if "License" not in readme_part:
         readme_part = f"{readme_part}\n\n## License\n\nMIT License\n\nCopyright (c) 2025"
 
-    print("✅ Successfully extracted and validated index.html and README.md")
-    print(f"   - HTML size: {len(html_part)} chars")
-    print(f"   - README size: {len(readme_part)} chars")
+    log.info("✅ Successfully extracted and validated index.html and README.md")
+    log.debug("   - HTML size: %d chars", len(html_part))
+    log.debug("   - README size: %d chars", len(readme_part))
     
     # Log embedded images info
-    if base64_images:
-        print(f"📸 Embedded {len(base64_images)} base64 image(s) in HTML for testing")
+    if image_parts:
+        log.info("📸 Embedded %d base64 image(s) in HTML for testing", len(image_parts))
 
     return {
         "index.html": html_part,
@@ -1,68 +1,101 @@
+from dotenv import load_dotenv
+
+# Load environment variables once, before the modules below read them at import time
+load_dotenv()
+
 from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
 from schemas import BuildRequest
-from github_utils import create_or_update_repo
+from github_utils import ensure_repo, commit_files, delete_repo
 from llm_generator import generate_app_code
-import requests
+import httpx
+import orjson
+import asyncio
+import functools
+import hashlib
+import hmac
+import logging
 import os
-import time
+import random
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Per-step trace lines are logged at DEBUG; set LOG_LEVEL=DEBUG to see them
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+log = logging.getLogger(__name__)
 
-app = FastAPI()
+# Responses are serialised with orjson instead of the stdlib json encoder
+app = FastAPI(default_response_class=ORJSONResponse)
 STUDENT_SECRET = os.getenv("STUDENT_SECRET")
+# Digest of the expected secret, compared in constant time against each request's digest
+_SECRET_DIGEST = hashlib.sha256((STUDENT_SECRET or "").encode()).digest()
+
+# Shared keep-alive client for evaluation API callbacks
+_HTTP_CLIENT = httpx.AsyncClient(timeout=10, headers={"Content-Type": "application/json"})
+
+# Dedicated pool for blocking GitHub work, so concurrent builds neither starve the default
+# executor nor fan out unbounded against the GitHub API
+_GITHUB_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GITHUB_WORKERS", "16")),
+    thread_name_prefix="github"
+)
+
+# Accepted /build jobs by id, oldest first; each task resolves to (response body, status code)
+_JOBS = OrderedDict()
+_MAX_JOBS = 1000
+
+# Upper bound on build pipelines running at once; further jobs wait their turn
+_BUILD_SEMAPHORE = asyncio.Semaphore(int(os.getenv("BUILD_CONCURRENCY", "8")))
 
 
-def notify_evaluation_api_with_retry(evaluation_url: str, payload: dict, max_retries: int = 5) -> bool:
+async def notify_evaluation_api_with_retry(evaluation_url: str, payload: dict, max_retries: int = 5) -> bool:
     """
     Send repo metadata to evaluation API with exponential backoff retry.
-    Retries with delays: 1s, 2s, 4s, 8s, 16s
-    Returns True only if HTTP 200 received, False otherwise.
+    Retries with jittered delays around 1s, 2s, 4s, 8s (capped at 16s), awaited so the
+    event loop keeps serving other requests while backing off.
+    Returns True if a 2xx status is received, False otherwise.
     """
     if not evaluation_url:
-        print("⚠️ No evaluation URL provided")
+        log.warning("⚠️ No evaluation URL provided")
         return False
     
-    headers = {"Content-Type": "application/json"}
-    
     for attempt in range(max_retries):
+        # Full backoff step scaled by 0.5-1.5x so simultaneous failures don't retry in lockstep
+        delay = min(16, 2 ** attempt) * (0.5 + random.random())
         try:
-            response = requests.post(evaluation_url, json=payload, headers=headers, timeout=10)
+            response = await _HTTP_CLIENT.post(evaluation_url, content=orjson.dumps(payload))
             
-            if response.status_code == 200:
-                print(f"✅ Evaluation API notified successfully (HTTP 200 on attempt {attempt + 1})")
+            if 200 <= response.status_code < 300:
+                log.info("✅ Evaluation API notified successfully (HTTP %d on attempt %d)", response.status_code, attempt + 1)
                 return True
             elif response.status_code >= 500:
                 # Server error - retry with backoff
                 if attempt < max_retries - 1:
-                    delay = 2 ** attempt  # 1, 2, 4, 8, 16 seconds
-                    print(f"⚠️ HTTP {response.status_code} from evaluation API. Retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(delay)
+                    log.warning("⚠️ HTTP %d from evaluation API. Retrying in %.1fs... (attempt %d/%d)", response.status_code, delay, attempt + 1, max_retries)
+                    await asyncio.sleep(delay)
                 else:
-                    print(f"❌ Evaluation API returned HTTP {response.status_code} after {max_retries} attempts")
+                    log.error("❌ Evaluation API returned HTTP %d after %d attempts", response.status_code, max_retries)
                     return False
             else:
                 # Client error - don't retry
-                print(f"❌ Evaluation API returned HTTP {response.status_code}: {response.text}")
+                log.error("❌ Evaluation API returned HTTP %d: %s", response.status_code, response.text)
                 return False
                 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             if attempt < max_retries - 1:
-                delay = 2 ** attempt
-                print(f"⚠️ Evaluation API timeout. Retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(delay)
+                log.warning("⚠️ Evaluation API timeout. Retrying in %.1fs... (attempt %d/%d)", delay, attempt + 1, max_retries)
+                await asyncio.sleep(delay)
             else:
-                print(f"❌ Evaluation API timeout after {max_retries} attempts")
+                log.error("❌ Evaluation API timeout after %d attempts", max_retries)
                 return False
         except Exception as e:
             if attempt < max_retries - 1:
-                delay = 2 ** attempt
-                print(f"⚠️ Evaluation API error: {e}. Retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                time.sleep(delay)
+                log.warning("⚠️ Evaluation API error: %s. Retrying in %.1fs... (attempt %d/%d)", e, delay, attempt + 1, max_retries)
+                await asyncio.sleep(delay)
             else:
-                print(f"❌ Evaluation API error after {max_retries} attempts: {e}")
+                log.error("❌ Evaluation API error after %d attempts: %s", max_retries, e)
                 return False
     
     return False
@@ -71,65 +104,149 @@ def notify_evaluation_api_with_retry(evaluation_url: str, payload: dict, max_ret
 @app.post("/build")
 async def build_app(data: BuildRequest):
     """
-    Handles build or revise requests:
+    Accepts build or revise requests:
     1. Verifies secret
-    2. Generates/updates code using LLM
-    3. Creates or updates GitHub repo
-    4. Notifies evaluation API with retries
-    5. Enforces 10-minute deadline
+    2. Queues the build pipeline (see _run_build) as a background job
+    3. Returns the job id immediately; GET /build/{job_id} reports the outcome
     """
     
     start_time = datetime.now()
-    deadline = start_time + timedelta(minutes=10)
     
     # Step 1: Verify secret
-    print(f"\n🔐 Verifying secret for task: {data.task}, round: {data.round}")
-    if data.secret != STUDENT_SECRET:
-        print("❌ Invalid secret provided")
-        return {"status": "error", "detail": "Invalid secret"}, 401
+    log.info("🔐 Verifying secret for task: %s, round: %d", data.task, data.round)
+    supplied_digest = hashlib.sha256(data.secret.encode()).digest()
+    if not STUDENT_SECRET or not hmac.compare_digest(supplied_digest, _SECRET_DIGEST):
+        log.error("❌ Invalid secret provided")
+        return ORJSONResponse({"status": "error", "detail": "Invalid secret"}, status_code=401)
+
+    log.debug("✅ Secret verified")
+
+    # Drop the oldest finished jobs so the registry stays bounded
+    while len(_JOBS) >= _MAX_JOBS:
+        oldest_id = next((job_id for job_id, task in _JOBS.items() if task.done()), None)
+        if oldest_id is None:
+            break
+        del _JOBS[oldest_id]
+
+    job_id = uuid.uuid4().hex
+    _JOBS[job_id] = asyncio.create_task(_run_build(data, start_time))
+    log.info("📥 Queued build job %s", job_id)
+
+    return {
+        "status": "accepted",
+        "message": f"Accepted request for task: {data.task}, round: {data.round}",
+        "job_id": job_id,
+    }
+
 
-    print("✅ Secret verified")
+@app.get("/build/{job_id}")
+async def build_status(job_id: str):
+    """
+    Report a queued build: pending while it runs, then the pipeline's final response.
+    """
+    task = _JOBS.get(job_id)
+    if task is None:
+        return ORJSONResponse({"status": "error", "detail": "Unknown job id"}, status_code=404)
+    if not task.done():
+        return {"status": "pending", "job_id": job_id}
+
+    body, status_code = task.result()
+    return ORJSONResponse(body, status_code=status_code)
+
+
+async def _run_build(data: BuildRequest, start_time: datetime):
+    """
+    Build pipeline for an accepted request, at most BUILD_CONCURRENCY at a time.
+    Returns (response body, status code); unexpected errors become a 500 body.
+    """
+    async with _BUILD_SEMAPHORE:
+        try:
+            return await _build_pipeline(data, start_time)
+        except Exception as e:
+            # Runs detached from the request, so log the traceback here
+            log.exception("❌ Build pipeline failed: %s", e)
+            return {"status": "error", "detail": f"Build failed: {str(e)}"}, 500
 
-    # Step 2: Generate app files from LLM
-    print(f"🤖 Generating code from brief: {data.brief[:50]}...")
-    files_to_push = generate_app_code(data.brief, data.attachments)
+
+async def _build_pipeline(data: BuildRequest, start_time: datetime):
+    """
+    Handles the work behind a build or revise request:
+    1. Generates/updates code using LLM
+    2. Creates or updates GitHub repo
+    3. Notifies evaluation API with retries
+    4. Enforces 10-minute deadline
+    """
+    deadline = start_time + timedelta(minutes=10)
+
+    # Step 2: Generate app files from LLM while the repo is created/looked up
+    # Repo setup doesn't need the files, so its GitHub round-trips overlap the Gemini call
+    create_new = data.round == 1
+    existing_repo_url = None if create_new else data.repo_url
+    loop = asyncio.get_running_loop()
+
+    log.info("🤖 Generating code from brief: %.50s...", data.brief)
+    log.info("📦 %s GitHub repo...", "Creating" if create_new else "Updating")
+    files_to_push, repo_setup = await asyncio.gather(
+        generate_app_code(data.brief, data.attachments),
+        # Runs on a worker thread: repo setup blocks on GitHub I/O
+        loop.run_in_executor(
+            _GITHUB_EXECUTOR,
+            functools.partial(ensure_repo, task_name=data.task, create_new=create_new, repo_url=existing_repo_url)
+        ),
+        return_exceptions=True
+    )
+
+    if isinstance(files_to_push, Exception):
+        log.error("❌ LLM code generation raised: %s", files_to_push)
+        files_to_push = {}
 
     # Check if generation succeeded
     if not files_to_push:
-        print("❌ LLM code generation failed")
+        log.error("❌ LLM code generation failed")
+        # Don't leave an empty repo behind for a BUILD that produced nothing
+        if create_new and not isinstance(repo_setup, Exception):
+            await loop.run_in_executor(_GITHUB_EXECUTOR, delete_repo, repo_setup[0])
         return {
             "status": "error",
             "detail": "Failed to generate app code from LLM"
         }, 500
 
-    print(f"✅ Generated files: {list(files_to_push.keys())}")
+    log.info("✅ Generated files: %s", list(files_to_push))
     
-    # Debug: Check file contents
-    for filename, content in files_to_push.items():
-        print(f"   📄 {filename}: {len(content)} characters")
-        if filename == "index.html":
-            if content.startswith("<!DOCTYPE html>"):
-                print(f"      ✅ Valid HTML start")
-            else:
-                print(f"      ⚠️ WARNING: HTML doesn't start with <!DOCTYPE html>")
-                print(f"      First 100 chars: {content[:100]}")
+    # Debug: Check file contents (skipped entirely unless DEBUG logging is enabled)
+    if log.isEnabledFor(logging.DEBUG):
+        for filename, content in files_to_push.items():
+            log.debug("   📄 %s: %d characters", filename, len(content))
+            if filename == "index.html":
+                if content.startswith("<!DOCTYPE html>"):
+                    log.debug("      ✅ Valid HTML start")
+                else:
+                    log.debug("      ⚠️ WARNING: HTML doesn't start with <!DOCTYPE html>")
+                    log.debug("      First 100 chars: %.100s", content)
 
-    # Step 3: Create new repo (BUILD round 1) or update existing repo (REVISE round 2+)
+    # Step 3: Commit the files to the new (BUILD round 1) or existing (REVISE round 2+) repo
     try:
-        create_new = data.round == 1
-        existing_repo_url = None if create_new else data.repo_url
-
-        print(f"📦 {'Creating' if create_new else 'Updating'} GitHub repo...")
-        repo_url, commit_sha, pages_url = create_or_update_repo(
-            task_name=data.task,
-            files=files_to_push,
-            create_new=create_new,
-            repo_url=existing_repo_url
+        if isinstance(repo_setup, Exception):
+            raise repo_setup
+        repo, repo_name, pages_url, pages_enabled = repo_setup
+
+        # Runs on a worker thread: the commit drives its own event loop and polls Pages
+        repo_url, commit_sha, pages_url = await loop.run_in_executor(
+            _GITHUB_EXECUTOR,
+            functools.partial(
+                commit_files,
+                repo,
+                repo_name,
+                pages_url,
+                files=files_to_push,
+                create_new=create_new,
+                pages_enabled=pages_enabled
+            )
         )
-        print("✅ Repo operation successful")
+        log.info("✅ Repo operation successful")
 
     except Exception as e:
-        print(f"❌ GitHub repo operation failed: {e}")
+        log.error("❌ GitHub repo operation failed: %s", e)
         return {
             "status": "error",
             "detail": f"Failed to create/update GitHub repo: {str(e)}"
@@ -137,10 +254,10 @@ async def build_app(data: BuildRequest):
 
     # Step 4: Check deadline before notifying
     if datetime.now() > deadline:
-        print(f"⚠️ WARNING: 10-minute deadline exceeded! Request took {(datetime.now() - start_time).total_seconds():.1f}s")
+        log.warning("⚠️ WARNING: 10-minute deadline exceeded! Request took %.1fs", (datetime.now() - start_time).total_seconds())
 
     # Step 5: Notify evaluation API with retry logic
-    print(f"📢 Notifying evaluation API at {data.evaluation_url}...")
+    log.info("📢 Notifying evaluation API at %s...", data.evaluation_url)
     payload = {
         "email": data.email,
         "task": data.task,
@@ -151,19 +268,19 @@ async def build_app(data: BuildRequest):
         "pages_url": pages_url,
     }
     
-    notification_success = notify_evaluation_api_with_retry(data.evaluation_url, payload)
+    notification_success = await notify_evaluation_api_with_retry(data.evaluation_url, payload)
     
     if not notification_success:
-        print("⚠️ Failed to notify evaluation API after retries")
-        print(f"   (This is expected if using httpbin.org for testing)")
+        log.warning("⚠️ Failed to notify evaluation API after retries")
+        log.warning("   (This is expected if using httpbin.org for testing)")
         # Still return 200 because repo was created successfully
         # The evaluation API will re-query if needed
 
-    print("\n✨ BUILD/REVISE completed successfully!")
+    log.info("✨ BUILD/REVISE completed successfully!")
     return {
         "status": "success",
         "message": f"Completed request for task: {data.task}, round: {data.round}",
         "repo_url": repo_url,
         "pages_url": pages_url,
         "commit_sha": commit_sha,
-    }, 200
+    }, 200
\ No newline at end of file
@@ -1,4 +1,13 @@
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+# Shared keep-alive session: repeat notifications reuse the TCP/TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0))
 
 def notify_evaluation_api(url, payload):
     """
@@ -6,12 +15,11 @@ def notify_evaluation_api(url, payload):
     Returns HTTP status or detailed error message.
     """
     try:
-        print(f"Sending notification to {url} with payload:")
-        print(payload)
+        log.debug("Sending notification to %s with payload: %s", url, payload)
         
-        r = requests.post(url, json=payload)
-        print(f"Response status: {r.status_code}")
-        print(f"Response text: {r.text}")
+        r = _SESSION.post(url, json=payload)
+        log.debug("Response status: %d", r.status_code)
+        log.debug("Response text: %s", r.text)
 
         if r.status_code == 200:
             return 200
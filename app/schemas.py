@@ -1,8 +1,58 @@
-from pydantic import BaseModel
-from typing import List, Optional
+import base64
+import binascii
+import re
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import List, NamedTuple, Optional
+
+# Header of a base64 data URL (optional parameters allowed); the group is the MIME type
+_DATA_URL_RE = re.compile(r"data:([^;,]+)[^,]*;base64,", re.ASCII)
+
+
+class Attachment(NamedTuple):
+    """A parsed data URL attachment: MIME type and its (validated) base64 payload."""
+    mime: str
+    data: str
+
+
+def _valid_b64(data: str, chunk_size: int = 4096) -> bool:
+    """
+    Check that data is well-formed base64 without decoding it all at once.
+    Validates 4 KB slices (a multiple of 4, so chunk boundaries never split a quantum),
+    keeping the working set small for multi-MB attachments.
+    """
+    try:
+        for i in range(0, len(data), chunk_size):
+            base64.b64decode(data[i:i + chunk_size], validate=True)
+    except (binascii.Error, ValueError):
+        return False
+    return True
+
+
+def parse_data_url(data_url: str) -> Attachment:
+    """
+    Parse a data URL of the form "data:mime/type;base64,<base64_data>" into an Attachment.
+    Raises ValueError if it isn't an ASCII base64 data URL.
+    """
+    # Data URLs are pure ASCII. CPython stores ASCII str at one byte per char, so they
+    # stay as compact as bytes and go into the JSON payload without a re-encode.
+    if not data_url.isascii():
+        raise ValueError("attachments must be ASCII data URLs")
+
+    # Only the short header is matched; the payload is sliced off once without splitting it
+    match = _DATA_URL_RE.match(data_url)
+    if not match:
+        raise ValueError("attachments must be base64 data URLs")
+
+    data = data_url[match.end():]
+    if not _valid_b64(data):
+        raise ValueError(f"attachment has invalid base64 data ({match.group(1)})")
+    return Attachment(match.group(1), data)
 
 
 class BuildRequest(BaseModel):
+    # Unknown fields from the evaluator are dropped rather than stored on the model
+    model_config = ConfigDict(extra="ignore")
+
     email: str
     secret: str
     task: str
@@ -10,5 +60,19 @@ class BuildRequest(BaseModel):
     nonce: str
     brief: str
     evaluation_url: str
-    attachments: List[str] = []
-    repo_url: Optional[str] = None
\ No newline at end of file
+    attachments: List[Attachment] = []
+    repo_url: Optional[str] = None
+
+    # Clients send data URL strings (as documented in the OpenAPI schema); they are parsed
+    # and validated once on entry and malformed ones are rejected with a 422
+    @field_validator("attachments", mode="before", json_schema_input_type=List[str])
+    @classmethod
+    def parse_attachments(cls, attachments):
+        if not isinstance(attachments, list):
+            raise ValueError("attachments must be a list of data URLs")
+        parsed = []
+        for attachment in attachments:
+            if not isinstance(attachment, str):
+                raise ValueError("attachments must be base64 data URL strings")
+            parsed.append(parse_data_url(attachment))
+        return parsed
\ No newline at end of file